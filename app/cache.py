@@ -0,0 +1,28 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class FragmentCache:
+    """Small LRU of rendered HTML fragments.
+
+    Keys must include whatever version the fragment depends on (e.g. the library
+    index version), so stale entries are simply never hit again and age out.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> str:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        html = render()
+        with self._lock:
+            self._entries[key] = html
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
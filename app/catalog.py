@@ -0,0 +1,390 @@
+import difflib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+LOGGER = logging.getLogger(__name__)
+
+# Local catalog database (can be overridden via env)
+CATALOG_DB = os.environ.get(
+    "CATALOG_DB", os.path.expanduser("~/.cache/rp-rom-fetcher/catalog.sqlite")
+)
+# Seconds to wait between listing page requests so we stay polite to the sites
+CATALOG_DELAY = float(os.environ.get("CATALOG_DELAY", "2"))
+# Listing pages fetched more recently than this are skipped during a refresh
+CATALOG_MAX_AGE = float(os.environ.get("CATALOG_MAX_AGE_HOURS", "24")) * 3600
+# Hard cap on pages fetched per sync run so one run never hammers a site for hours
+CATALOG_MAX_PAGES = int(os.environ.get("CATALOG_MAX_PAGES", "500"))
+# Seconds between sync runs; much shorter than the max age so capped runs catch up
+CATALOG_SYNC_INTERVAL = float(os.environ.get("CATALOG_SYNC_INTERVAL_MINUTES", "60")) * 60
+# Seconds a process holds the crawl lease without renewing it (renewed after every page)
+SYNC_LEASE = 600
+# The spell-correction vocabulary is rebuilt after this many crawled pages (and after each run)
+VOCAB_REFRESH_PAGES = 50
+
+# Minimum share of the query's trigrams a title must contain to count as a match.
+MIN_SIMILARITY = 0.5
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _trigrams(text: str) -> Set[str]:
+    text = f"  {text.lower()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _similarity(query: str, title: str) -> float:
+    """Share of `query` trigrams found in `title`; tolerant of typos and word order."""
+    wanted = _trigrams(query)
+    if not wanted:
+        return 0.0
+    return len(wanted & _trigrams(title)) / len(wanted)
+
+
+class Catalog:
+    """SQLite full-text index of every game listed by the scrapers' console pages.
+
+    Uses an FTS5 trigram index when the SQLite build supports it (3.34+), and
+    falls back to the default word tokenizer otherwise.
+    """
+
+    def __init__(self, path: str = CATALOG_DB):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._sync_thread: Optional[threading.Thread] = None
+        self._sync_start_lock = threading.Lock()
+        self._owner = f"{os.getpid()}:{id(self)}"
+        self._vocab: Optional[Dict[int, List[str]]] = None
+        self._vocab_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            self.trigram = self._create_schema(conn)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection per operation, so any thread can use the catalog."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _create_schema(self, conn: sqlite3.Connection) -> bool:
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS games (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                url TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                console TEXT,
+                size TEXT,
+                seen_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS listings (
+                url TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                next_url TEXT,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sync_lease (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            """
+        )
+        exists = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'games_fts'"
+        ).fetchone()
+        if exists:
+            return "trigram" in exists["sql"]
+        try:
+            self._create_fts(conn, "trigram")
+            return True
+        except sqlite3.OperationalError:
+            self._create_fts(conn, "unicode61 remove_diacritics 2")
+            return False
+
+    @staticmethod
+    def _create_fts(conn: sqlite3.Connection, tokenizer: str) -> None:
+        conn.executescript(
+            f"""
+            CREATE VIRTUAL TABLE games_fts USING fts5(
+                title, content='games', content_rowid='id', tokenize='{tokenizer}'
+            );
+            CREATE TRIGGER games_ai AFTER INSERT ON games BEGIN
+                INSERT INTO games_fts(rowid, title) VALUES (new.id, new.title);
+            END;
+            CREATE TRIGGER games_ad AFTER DELETE ON games BEGIN
+                INSERT INTO games_fts(games_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            END;
+            CREATE TRIGGER games_au AFTER UPDATE OF title ON games BEGIN
+                INSERT INTO games_fts(games_fts, rowid, title) VALUES ('delete', old.id, old.title);
+                INSERT INTO games_fts(rowid, title) VALUES (new.id, new.title);
+            END;
+            """
+        )
+
+    # ------------------------------------------------------------------ search
+
+    def _fts_query(self, query: str) -> Optional[str]:
+        """Build a MATCH expression that finds candidates even when the query has typos."""
+        if self.trigram:
+            grams = sorted(g for g in _trigrams(query) if " " not in g)
+            terms = ['"{}"'.format(g.replace('"', '""')) for g in grams]
+        else:
+            terms = ['"{}"*'.format(word.replace('"', '""')) for word in query.lower().split()]
+        return " OR ".join(terms) or None
+
+    def _candidates(self, query: str, limit: int) -> List[Dict]:
+        match = self._fts_query(query)
+        with self._connect() as conn:
+            if match:
+                rows = conn.execute(
+                    "SELECT g.title, g.url, g.source, g.size, g.console FROM games_fts"
+                    " JOIN games g ON g.id = games_fts.rowid"
+                    " WHERE games_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (match, limit),
+                ).fetchall()
+            else:
+                # Too short for trigrams: plain prefix lookup
+                rows = conn.execute(
+                    "SELECT title, url, source, size, console FROM games"
+                    " WHERE title LIKE ? LIMIT ?",
+                    (f"{query}%", limit),
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _vocabulary(self) -> Dict[int, List[str]]:
+        """Distinct title words bucketed by length.
+
+        Cleared every `VOCAB_REFRESH_PAGES` crawled pages and after each crawl run.
+        """
+        with self._vocab_lock:
+            if self._vocab is None:
+                words: Set[str] = set()
+                with self._connect() as conn:
+                    for row in conn.execute("SELECT title FROM games"):
+                        words.update(_WORD_RE.findall(row["title"].lower()))
+                vocab: Dict[int, List[str]] = {}
+                for word in words:
+                    vocab.setdefault(len(word), []).append(word)
+                self._vocab = vocab
+            return self._vocab
+
+    def _correct(self, query: str) -> str:
+        """Replace words missing from the catalog with their closest known spelling."""
+        vocab = self._vocabulary()
+        corrected = []
+        for word in _WORD_RE.findall(query.lower()):
+            if len(word) < 3 or word in vocab.get(len(word), ()):
+                corrected.append(word)
+                continue
+            pool = [w for n in (len(word) - 1, len(word), len(word) + 1) for w in vocab.get(n, ())]
+            close = difflib.get_close_matches(word, pool, n=1, cutoff=0.75)
+            corrected.append(close[0] if close else word)
+        return " ".join(corrected)
+
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        """Return catalog entries matching `query`, best first, in scraper result format.
+
+        Misspelled words are corrected against the catalog vocabulary, and candidates
+        from the trigram index are kept when they share enough trigrams with the query.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        queries = [query.lower()]
+        corrected = self._correct(query)
+        if corrected != queries[0]:
+            queries.append(corrected)
+
+        best: Dict[str, tuple] = {}
+        for q in queries:
+            for item in self._candidates(q, limit * 8):
+                title = item["title"].lower()
+                score = 1.0 if q in title else _similarity(q, title)
+                if score >= MIN_SIMILARITY and score > best.get(item["url"], (0,))[0]:
+                    best[item["url"]] = (score, item)
+        scored = sorted(best.values(), key=lambda pair: (-pair[0], len(pair[1]["title"])))
+        return [item for _score, item in scored[:limit]]
+
+    def is_strong_match(self, query: str, hits: List[Dict]) -> bool:
+        """True if some hit contains every word of the query (or of its spell-corrected form).
+
+        Fuzzy near-misses from `search` are fine for ranking and typeahead, but only a
+        strong match means the catalog really has the game and live scraping can be skipped.
+        """
+        queries = {query.lower(), self._correct(query)}
+        word_sets = [set(_WORD_RE.findall(q.lower())) for q in queries]
+        for item in hits:
+            title_words = set(_WORD_RE.findall(item["title"].lower()))
+            if any(words and words <= title_words for words in word_sets):
+                return True
+        return False
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """Return distinct titles for typeahead."""
+        titles: List[str] = []
+        seen = set()
+        for item in self.search(prefix, limit=limit * 3):
+            key = item["title"].lower()
+            if key not in seen:
+                seen.add(key)
+                titles.append(item["title"])
+            if len(titles) >= limit:
+                break
+        return titles
+
+    # ------------------------------------------------------------------- crawl
+
+    def _store_page(self, source: str, url: str, next_url: Optional[str], items: Iterable[Dict]) -> None:
+        now = time.time()
+        with self._write_lock, self._connect() as conn:
+            for item in items:
+                conn.execute(
+                    "INSERT INTO games (source, url, title, console, size, seen_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT(url) DO UPDATE SET title = excluded.title,"
+                    " console = excluded.console, size = excluded.size, seen_at = excluded.seen_at",
+                    (source, item["url"], item["title"], item.get("console"), item.get("size"), now),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO listings (url, source, next_url, fetched_at) VALUES (?, ?, ?, ?)",
+                (url, source, next_url, now),
+            )
+
+    def _invalidate_vocabulary(self) -> None:
+        with self._vocab_lock:
+            self._vocab = None
+
+    def _fresh_listing(self, url: str) -> Optional[sqlite3.Row]:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT next_url FROM listings WHERE url = ? AND fetched_at > ?",
+                (url, time.time() - CATALOG_MAX_AGE),
+            ).fetchone()
+
+    def _fetched_at(self, urls: List[str]) -> Dict[str, float]:
+        """Return when each of `urls` was last fetched; never-fetched URLs are left out."""
+        if not urls:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT url, fetched_at FROM listings WHERE url IN ({})".format(", ".join("?" * len(urls))),
+                urls,
+            ).fetchall()
+        return {row["url"]: row["fetched_at"] for row in rows}
+
+    def _claim_lease(self) -> bool:
+        """Take or renew the crawl lease; True if this catalog now holds it.
+
+        The lease lives in the database, so of several server processes sharing
+        one catalog only one crawls at a time.
+        """
+        now = time.time()
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sync_lease (id, owner, expires_at) VALUES (1, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+                " WHERE sync_lease.owner = excluded.owner OR sync_lease.expires_at < ?",
+                (self._owner, now + SYNC_LEASE, now),
+            )
+            row = conn.execute("SELECT owner FROM sync_lease WHERE id = 1").fetchone()
+        return row["owner"] == self._owner
+
+    def _release_lease(self) -> None:
+        with self._write_lock, self._connect() as conn:
+            conn.execute("DELETE FROM sync_lease WHERE owner = ?", (self._owner,))
+
+    def crawl(self, scrapers: Iterable) -> int:
+        """Refresh stale listing pages of every scraper; return the number of pages fetched.
+
+        Pages fetched within `CATALOG_MAX_AGE` are skipped (their stored next-page
+        link is followed instead), and requests are spaced by `CATALOG_DELAY`. A page
+        that fails to load is not stored; the crawl moves on to the next console.
+
+        Consoles are walked never-fetched first, then by the age of their first page, so
+        a run cut short by `CATALOG_MAX_PAGES` is resumed by the next one rather than
+        re-walking the same consoles every time. Returns 0 without crawling while
+        another process holds the crawl lease.
+        """
+        if not self._claim_lease():
+            LOGGER.info("Catalog sync skipped: another process is crawling")
+            return 0
+        listings = [
+            (scraper, console, start_url)
+            for scraper in scrapers
+            for console, start_url in scraper.CATALOG_LISTINGS.items()
+        ]
+        fetched_at = self._fetched_at([start_url for _s, _c, start_url in listings])
+        listings.sort(key=lambda listing: fetched_at.get(listing[2], 0.0))
+
+        fetched = 0
+        try:
+            for scraper, console, start_url in listings:
+                url = start_url
+                visited = set()
+                while url and url not in visited and fetched < CATALOG_MAX_PAGES:
+                    visited.add(url)
+                    fresh = self._fresh_listing(url)
+                    if fresh:
+                        url = fresh["next_url"]
+                        continue
+                    try:
+                        items, next_url = scraper.crawl_page(url)
+                    except Exception as e:
+                        # Leave the page stale so the next run retries it
+                        LOGGER.warning("Catalog fetch of %s failed: %s", url, e)
+                        time.sleep(CATALOG_DELAY)
+                        break
+                    for item in items:
+                        if not item.get("console"):
+                            item["console"] = console
+                    self._store_page(scraper.name, url, next_url, items)
+                    fetched += 1
+                    if fetched % VOCAB_REFRESH_PAGES == 0:
+                        self._invalidate_vocabulary()
+                    if not self._claim_lease():
+                        LOGGER.warning("Catalog sync stopped: crawl lease was taken over")
+                        return fetched
+                    url = next_url
+                    time.sleep(CATALOG_DELAY)
+        finally:
+            self._release_lease()
+            if fetched % VOCAB_REFRESH_PAGES:
+                self._invalidate_vocabulary()
+        LOGGER.info("Catalog sync fetched %d listing pages", fetched)
+        return fetched
+
+    def start_background_sync(self, scrapers: List, interval: float) -> None:
+        """Crawl in a daemon thread now and then every `interval` seconds.
+
+        Safe to call repeatedly; at most one sync thread runs per catalog.
+        """
+
+        def run():
+            while True:
+                try:
+                    self.crawl(scrapers)
+                except Exception as e:
+                    LOGGER.warning("Catalog sync failed: %s", e)
+                time.sleep(interval)
+
+        with self._sync_start_lock:
+            if self._sync_thread and self._sync_thread.is_alive():
+                return
+            self._sync_thread = threading.Thread(target=run, name="catalog-sync", daemon=True)
+            self._sync_thread.start()
+
+
+CATALOG = Catalog()
@@ -0,0 +1,205 @@
+import os
+import re
+import struct
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple
+
+# Bytes buffered from the start of a download before choosing its directory. Large
+# enough for SNES HiROM headers (0xFFC0 + copier header) and raw-CD ISO9660 descriptors.
+HEADER_SIZE = 0x10400
+
+_GB_LOGO = bytes.fromhex("CEED6666CC0D000B03730083000C000D")
+_GBA_LOGO = bytes.fromhex("24FFAE51699AA2213D84820A")
+_N64_MAGIC = {
+    b"\x80\x37\x12\x40",  # .z64, big-endian
+    b"\x37\x80\x40\x12",  # .v64, byte-swapped
+    b"\x40\x12\x37\x80",  # .n64, little-endian
+}
+# Primary volume descriptor offsets: 2048-byte sectors, raw MODE1 and MODE2 sectors
+_ISO_PVD_OFFSETS = (16 * 2048, 16 * 2352 + 16, 16 * 2352 + 24)
+# Discs larger than a CD (in 2048-byte blocks) are treated as DVDs, i.e. PS2
+_CD_MAX_BLOCKS = 360000
+
+# Normalized (lowercase, alphanumerics only) console names → console codes of `CONSOLE_DIR_MAP`.
+# Covers scraper codes, WowRoms' human-readable names and `normalize_console_name` output.
+CONSOLE_ALIASES = {
+    "nes": "nes",
+    "famicom": "nes",
+    "nintendoentertainmentsystem": "nes",
+    "nintendones": "nes",
+    "snes": "snes",
+    "superfamicom": "snes",
+    "supernintendo": "snes",
+    "supernintendoentertainmentsystem": "snes",
+    "supernes": "snes",
+    "gb": "gb",
+    "gameboy": "gb",
+    "nintendogameboy": "gb",
+    "gbc": "gbc",
+    "gameboycolor": "gbc",
+    "nintendogameboycolor": "gbc",
+    "gba": "gba",
+    "gameboyadvance": "gba",
+    "nintendogameboyadvance": "gba",
+    "n64": "n64",
+    "nintendo64": "n64",
+    "genesis": "genesis",
+    "segagenesis": "genesis",
+    "megadrive": "megadrive",
+    "segamegadrive": "megadrive",
+    "psx": "psx",
+    "ps1": "psx",
+    "playstation": "psx",
+    "sonyplaystation": "psx",
+    "playstation1": "psx",
+    "ps2": "ps2",
+    "playstation2": "ps2",
+    "sonyplaystation2": "ps2",
+    "mame": "mame",
+    "arcade": "arcade",
+}
+_LONGEST_ALIAS_WORDS = 5
+
+# ROM file extensions → console codes. Disc images (.iso, .bin) are ambiguous and left to the header.
+EXTENSIONS = {
+    ".nes": "nes",
+    ".fds": "nes",
+    ".sfc": "snes",
+    ".smc": "snes",
+    ".gb": "gb",
+    ".gbc": "gbc",
+    ".gba": "gba",
+    ".n64": "n64",
+    ".z64": "n64",
+    ".v64": "n64",
+    ".md": "genesis",
+    ".gen": "genesis",
+    ".smd": "genesis",
+}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def _normalize(name: str) -> str:
+    return _NON_ALNUM.sub("", name.lower())
+
+
+def console_code(name: Optional[str]) -> Optional[str]:
+    """Map a console name as reported by a scraper (code or human-readable) to a console code."""
+    if not name:
+        return None
+    return CONSOLE_ALIASES.get(_normalize(name))
+
+
+def classify_name(path: str) -> Optional[str]:
+    """Guess the console from a file path: extension first, then whole words of the path.
+
+    Words are matched against `CONSOLE_ALIASES`, longest run first, so "Game Boy Advance"
+    wins over "Game Boy" and "gb" never matches inside "gba".
+    """
+    code = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if code:
+        return code
+    words = [w for w in _NON_ALNUM.split(path.lower()) if w]
+    for size in range(min(_LONGEST_ALIAS_WORDS, len(words)), 0, -1):
+        for i in range(len(words) - size + 1):
+            code = CONSOLE_ALIASES.get("".join(words[i:i + size]))
+            if code:
+                return code
+    return None
+
+
+def _snes_header_ok(data: bytes, offset: int) -> bool:
+    if len(data) < offset + 0x20:
+        return False
+    complement, checksum = struct.unpack_from("<HH", data, offset + 0x1C)
+    return complement ^ checksum == 0xFFFF and checksum not in (0, 0xFFFF)
+
+
+def _classify_iso(data: bytes) -> Optional[str]:
+    for offset in _ISO_PVD_OFFSETS:
+        if data[offset:offset + 6] != b"\x01CD001":
+            continue
+        system_id = data[offset + 8:offset + 40].decode("ascii", "ignore").strip()
+        if system_id.startswith("PLAYSTATION"):
+            if len(data) < offset + 84:
+                return "psx"  # volume size cut off; a CD is the likelier case
+            (blocks,) = struct.unpack_from("<I", data, offset + 80)
+            return "ps2" if blocks > _CD_MAX_BLOCKS else "psx"
+        return None
+    return None
+
+
+def _unzip_first_member(data: bytes) -> Tuple[Optional[str], bytes]:
+    """Return the name and leading bytes of the first member of a (partial) zip archive."""
+    if len(data) < 30:
+        return None, b""
+    method, _t, _d, _crc, _csize, _usize, name_len, extra_len = struct.unpack_from("<HHHIIIHH", data, 8)
+    start = 30 + name_len + extra_len
+    name = data[30:30 + name_len].decode("utf-8", "replace")
+    payload = data[start:]
+    if method == 0:
+        return name, payload
+    if method == 8:
+        try:
+            return name, zlib.decompressobj(-zlib.MAX_WBITS).decompress(payload, HEADER_SIZE)
+        except zlib.error:
+            return name, b""
+    return name, b""
+
+
+def classify_header(data: bytes) -> Optional[str]:
+    """Identify a ROM from its leading bytes (magic numbers and cartridge/disc headers)."""
+    if data[:4] == b"NES\x1a":
+        return "nes"
+    if data[:4] in _N64_MAGIC:
+        return "n64"
+    if data[0x04:0x04 + len(_GBA_LOGO)] == _GBA_LOGO and data[0xB2:0xB3] == b"\x96":
+        return "gba"
+    if data[0x104:0x104 + len(_GB_LOGO)] == _GB_LOGO:
+        return "gbc" if data[0x143:0x144] in (b"\x80", b"\xc0") else "gb"
+    if b"SEGA" in data[0x100:0x110]:
+        return "genesis"
+    iso = _classify_iso(data)
+    if iso:
+        return iso
+    # SNES has no magic; validate the internal header's checksum pair (optionally after
+    # a 512-byte copier header) at the LoROM and HiROM locations
+    for copier in (0, 0x200):
+        if _snes_header_ok(data, copier + 0x7FC0) or _snes_header_ok(data, copier + 0xFFC0):
+            return "snes"
+    return None
+
+
+def classify(header: bytes = b"", filename: Optional[str] = None, console: Optional[str] = None) -> Optional[str]:
+    """Return the console code for a download, or None if it cannot be determined.
+
+    The ROM header wins (looking inside zip archives), then the file extension, then
+    the console name the scraper reported.
+    """
+    if header[:4] == b"PK\x03\x04":
+        inner_name, inner = _unzip_first_member(header)
+        code = classify_header(inner) if inner else None
+        if not code and inner_name:
+            code = EXTENSIONS.get(os.path.splitext(inner_name)[1].lower())
+    else:
+        code = classify_header(header) if header else None
+    if not code and filename:
+        code = EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+    return code or console_code(console)
+
+
+def read_header(chunks: Iterable[bytes]) -> Tuple[bytes, Iterator[bytes]]:
+    """Buffer up to `HEADER_SIZE` bytes from a chunk stream.
+
+    Returns the buffered bytes and an iterator over the rest of the stream, so the caller
+    can classify the download before deciding where to write it, without extra reads.
+    """
+    it = iter(chunks)
+    buf = bytearray()
+    for chunk in it:
+        if chunk:
+            buf += chunk
+        if len(buf) >= HEADER_SIZE:
+            break
+    return bytes(buf), it
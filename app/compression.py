@@ -0,0 +1,55 @@
+import gzip
+
+from flask import Flask, request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+# Only text responses at least this large are worth compressing
+COMPRESS_MIMETYPES = {"text/html", "application/json", "text/css", "application/javascript", "text/javascript"}
+COMPRESS_MIN_SIZE = 500
+
+
+def _choose_encoding() -> str:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return ""
+
+
+def init_compression(app: Flask) -> None:
+    """Add weak ETags with 304 handling, then gzip/brotli text responses."""
+
+    @app.after_request
+    def _compress(response):
+        if (
+            request.method != "GET"
+            or response.status_code != 200
+            or response.direct_passthrough
+            or response.mimetype not in COMPRESS_MIMETYPES
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        # Weak, so the same tag stays valid for every content-encoding of the body.
+        # Vary goes on first so 304s carry it too.
+        response.vary.add("Accept-Encoding")
+        response.add_etag(weak=True)
+        response.make_conditional(request)
+        if response.status_code != 200:
+            return response
+
+        body = response.get_data()
+        encoding = _choose_encoding()
+        if len(body) < COMPRESS_MIN_SIZE or not encoding:
+            return response
+        if encoding == "br":
+            response.set_data(brotli.compress(body, quality=4))
+        else:
+            response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers["Content-Encoding"] = encoding
+        return response
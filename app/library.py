@@ -0,0 +1,216 @@
+import os
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .classifier import HEADER_SIZE, classify
+from .utils import PARTIAL_SUFFIX, ROMS_BASE_DIR, console_to_dir
+
+# Sort keys accepted by the library view / API → function extracting the key from an entry.
+SORT_KEYS = {
+    "name": lambda g: g["title"].lower(),
+    "size": lambda g: g["size"],
+    "date": lambda g: g["mtime"],
+    "console": lambda g: (g["console"].lower(), g["title"].lower()),
+}
+
+DEFAULT_PER_PAGE = 48
+MAX_PER_PAGE = 500
+
+# Partial downloads untouched for this long were left behind by an interrupted run
+STALE_PARTIAL_AGE = 3600
+
+
+def _human_size(num_bytes: int) -> str:
+    """Format a byte count the same way scrapers report sizes (e.g. `12.3 MB`)."""
+    size = float(num_bytes)
+    if size < 1024:
+        return f"{int(size)} B"
+    for unit in ("KB", "MB"):
+        size /= 1024
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+    return f"{size / 1024:.1f} GB"
+
+
+class LibraryIndex:
+    """Cached, pre-sorted listing of every file under `ROMS_BASE_DIR`.
+
+    The listing is rebuilt only when the mtime of the base directory or of any
+    console directory changes (adding or removing a file bumps its parent's
+    mtime), so repeat page views cost one `stat` per console instead of a full walk.
+    """
+
+    def __init__(self, base_dir: str = ROMS_BASE_DIR):
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple] = None
+        self._entries: List[Dict] = []
+        self._sorted: Dict[Tuple[str, bool], List[Dict]] = {}
+        self._consoles: List[str] = []
+        self.version = 0
+
+    def _dir_signature(self) -> Tuple:
+        """Return a cheap fingerprint of the directory tree (mtimes of base + console dirs)."""
+        try:
+            sig = [("", os.stat(self.base_dir).st_mtime_ns)]
+            with os.scandir(self.base_dir) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        sig.append((entry.name, entry.stat().st_mtime_ns))
+        except FileNotFoundError:
+            return ()
+        return tuple(sorted(sig))
+
+    def _scan(self) -> List[Dict]:
+        games: List[Dict] = []
+        with os.scandir(self.base_dir) as consoles:
+            for console in consoles:
+                if not console.is_dir():
+                    continue
+                with os.scandir(console.path) as files:
+                    for f in files:
+                        if not f.is_file() or f.name.endswith(PARTIAL_SUFFIX):
+                            continue
+                        st = f.stat()
+                        slug = f.name.split(".")[0]
+                        games.append({
+                            "title": slug.replace("-", " ").title(),
+                            "slug": slug,
+                            "filename": f.name,
+                            "console": console.name,
+                            "size": st.st_size,
+                            "size_str": _human_size(st.st_size),
+                            "mtime": st.st_mtime,
+                        })
+        return games
+
+    def invalidate(self) -> None:
+        """Force a rescan on the next access (e.g. after a download or delete)."""
+        with self._lock:
+            self._signature = None
+
+    def refresh(self) -> None:
+        """Rescan the library if the directory tree changed since the last scan."""
+        signature = self._dir_signature()
+        with self._lock:
+            if signature == self._signature:
+                return
+            self._entries = self._scan() if signature else []
+            self._sorted = {}
+            self._consoles = sorted({g["console"] for g in self._entries})
+            self._signature = signature
+            self.version += 1
+
+    def consoles(self) -> List[str]:
+        self.refresh()
+        return list(self._consoles)
+
+    def sorted_entries(self, sort: str = "name", reverse: bool = False) -> List[Dict]:
+        """Return all entries sorted by `sort`; each ordering is computed once per version."""
+        self.refresh()
+        if sort not in SORT_KEYS:
+            sort = "name"
+        key = (sort, reverse)
+        with self._lock:
+            if key not in self._sorted:
+                self._sorted[key] = sorted(self._entries, key=SORT_KEYS[sort], reverse=reverse)
+            return self._sorted[key]
+
+    def query(
+        self,
+        page: int = 1,
+        per_page: int = DEFAULT_PER_PAGE,
+        sort: str = "name",
+        order: str = "asc",
+        console: Optional[str] = None,
+        q: Optional[str] = None,
+    ) -> Dict:
+        """Return one page of the (optionally filtered) library plus paging metadata."""
+        per_page = max(1, min(per_page, MAX_PER_PAGE))
+        games = self.sorted_entries(sort, reverse=(order == "desc"))
+        if console:
+            games = [g for g in games if g["console"] == console]
+        if q:
+            needle = q.lower()
+            games = [g for g in games if needle in g["title"].lower() or needle in g["filename"].lower()]
+
+        total = len(games)
+        pages = max(1, (total + per_page - 1) // per_page)
+        page = max(1, min(page, pages))
+        start = (page - 1) * per_page
+        return {
+            "items": games[start:start + per_page],
+            "page": page,
+            "per_page": per_page,
+            "pages": pages,
+            "total": total,
+            "has_next": page < pages,
+            "version": self.version,
+        }
+
+
+LIBRARY_INDEX = LibraryIndex()
+
+_resort_lock = threading.Lock()
+
+
+def resort_unsorted(base_dir: str = ROMS_BASE_DIR) -> int:
+    """Move files from `unsorted/` into their console directory; return how many moved.
+
+    Each file is classified from its header (and extension); files that still cannot be
+    classified, or whose destination name is taken, are left where they are.
+    """
+    unsorted = os.path.join(base_dir, "unsorted")
+    if not os.path.isdir(unsorted) or not _resort_lock.acquire(blocking=False):
+        return 0
+    moved = 0
+    try:
+        for entry in os.scandir(unsorted):
+            if not entry.is_file() or entry.name.endswith(PARTIAL_SUFFIX):
+                continue
+            # One unreadable or odd file must not end the whole job
+            try:
+                with open(entry.path, "rb") as f:
+                    header = f.read(HEADER_SIZE)
+                code = classify(header, filename=entry.name)
+                console_dir = console_to_dir(code) if code else "unsorted"
+                if console_dir == "unsorted":
+                    continue
+                dest_dir = os.path.join(base_dir, console_dir)
+                dest = os.path.join(dest_dir, entry.name)
+                if os.path.exists(dest):
+                    continue
+                os.makedirs(dest_dir, exist_ok=True)
+                os.replace(entry.path, dest)
+                moved += 1
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Could not re-sort {entry.path}: {e}")
+    finally:
+        _resort_lock.release()
+    if moved:
+        LIBRARY_INDEX.invalidate()
+    return moved
+
+
+def remove_stale_partials(base_dir: str = ROMS_BASE_DIR) -> int:
+    """Delete partial downloads left by a crash or restart; return how many were removed.
+
+    A download in progress rewrites its file continuously, so only files not modified
+    for `STALE_PARTIAL_AGE` seconds are removed.
+    """
+    cutoff = time.time() - STALE_PARTIAL_AGE
+    removed = 0
+    for root, _dirs, files in os.walk(base_dir):
+        for fname in files:
+            if not fname.endswith(PARTIAL_SUFFIX):
+                continue
+            path = os.path.join(root, fname)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError as e:
+                print(f"Could not remove {path}: {e}")
+    return removed
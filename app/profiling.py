@@ -0,0 +1,104 @@
+import cProfile
+import hmac
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from flask import Flask, g, request
+
+# Profile every request (set PROFILE_REQUESTS=1), or only requests with `?profile=1`
+# that carry the admin token (X-Admin-Token header or admin_token param).
+PROFILE_REQUESTS = os.environ.get("PROFILE_REQUESTS") == "1"
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# Where .prof files go; only the newest PROFILE_KEEP are kept
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.expanduser("~/.cache/rp-rom-fetcher/profiles"))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "20"))
+
+_local = threading.local()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a block under `name` for the current request's Server-Timing header.
+
+    A no-op unless the request on this thread is being profiled; repeated phases
+    with the same name are summed.
+    """
+    timings: Optional[Dict[str, float]] = getattr(_local, "timings", None)
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def _is_admin() -> bool:
+    if not ADMIN_TOKEN:
+        return False
+    token = request.headers.get("X-Admin-Token") or request.args.get("admin_token", "")
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def _should_profile() -> bool:
+    if request.endpoint == "static":
+        return False
+    return PROFILE_REQUESTS or (request.args.get("profile") == "1" and _is_admin())
+
+
+def _server_timing(timings: Dict[str, float], total: float) -> str:
+    metrics = []
+    for name, seconds in list(timings.items()) + [("total", total)]:
+        token = re.sub(r"[^A-Za-z0-9_-]", "", name.replace(" ", "_")) or "phase"
+        metrics.append(f'{token};dur={seconds * 1000:.1f};desc="{name}"')
+    return ", ".join(metrics)
+
+
+def _save_profile(profiler: cProfile.Profile) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    # Millisecond timestamp prefix keeps names unique and sorted oldest → newest
+    path = os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}-{request.endpoint or 'unknown'}.prof")
+    profiler.dump_stats(path)
+    profiles = sorted(f for f in os.listdir(PROFILE_DIR) if f.endswith(".prof"))
+    for old in profiles[:-PROFILE_KEEP]:
+        os.remove(os.path.join(PROFILE_DIR, old))
+
+
+def init_profiling(app: Flask) -> None:
+    """Register hooks that cProfile opted-in requests and report per-phase timings."""
+
+    @app.before_request
+    def _start_profile():
+        if not _should_profile():
+            return
+        _local.timings = {}
+        g.profile_start = time.perf_counter()
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    @app.after_request
+    def _finish_profile(response):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        total = time.perf_counter() - g.pop("profile_start")
+        response.headers["Server-Timing"] = _server_timing(_local.timings, total)
+        try:
+            _save_profile(profiler)
+        except OSError as e:
+            app.logger.warning("Could not save profile: %s", e)
+        return response
+
+    @app.teardown_request
+    def _clear_timings(_exc):
+        # after_request is skipped when an exception propagates; never leave the hook on
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+        _local.timings = None
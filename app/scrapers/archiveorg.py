@@ -2,7 +2,8 @@ import json
 import logging
 import requests
 from typing import List, Dict, Optional
-from .base import BaseScraper
+from .base import BaseScraper, Page, phase
+from ..classifier import classify_name
 
 LOGGER = logging.getLogger(__name__)
 
@@ -20,9 +21,12 @@ class ArchiveOrgScraper(BaseScraper):
         "?q=({query})+AND+{coll}"
         "&fl[]=identifier&fl[]=title&fl[]=downloads"
         "&sort[]=downloads+desc"  # most-popular first
-        "&output=json&rows=30&page=1"  # fetch up to 30 docs
+        "&output=json&rows={rows}&page={page}"
     ).format
 
+    # Docs per advanced-search page; each doc costs a metadata request, so keep it small
+    ROWS_PER_PAGE = 10
+
     METADATA_URL = "https://archive.org/metadata/{identifier}"
 
     # allowed extensions we consider actual ROMs / archives
@@ -45,7 +49,8 @@ class ArchiveOrgScraper(BaseScraper):
 
     def _choose_file(self, identifier: str) -> Optional[Dict]:
         try:
-            meta_resp = requests.get(self.METADATA_URL.format(identifier=identifier), timeout=8)
+            with phase(f"scrape {self.name}"):
+                meta_resp = requests.get(self.METADATA_URL.format(identifier=identifier), timeout=8)
             meta_resp.raise_for_status()
             data = meta_resp.json()
             files = data.get("files", [])
@@ -55,39 +60,28 @@ class ArchiveOrgScraper(BaseScraper):
                     size = f.get("size")
                     size_str = f"{int(size) / (1024 * 1024):.1f} MB" if size and size.isdigit() else None
                     url = f"https://archive.org/download/{identifier}/{name}"
-                    console_code = None
-                    # crude: check directory path or name for known consoles
-                    lower_name = name.lower()
-                    for key in (
-                        "nes",
-                        "snes",
-                        "gba",
-                        "gbc",
-                        "gb",
-                        "n64",
-                        "psx",
-                        "ps2",
-                        "genesis",
-                        "megadrive",
-                    ):
-                        if key in lower_name:
-                            console_code = key
-                            break
+                    # Extension first, then whole words of identifier/path ("gb" never matches "gba")
+                    console_code = classify_name(f"{identifier}/{name}")
                     return {"url": url, "size": size_str, "console": console_code}
         except Exception as e:
             LOGGER.debug("Archive.org metadata failed: %s", e)
         return None
 
-    def search(self, query: str) -> List[Dict]:
+    def search_page(self, query: str, cursor: Optional[str] = None, raise_errors: bool = False) -> Page:
         results: List[Dict] = []
+        next_cursor = None
+        # The cursor is the advanced-search page number
+        page = int(cursor) if cursor else 1
         try:
             # Build query with collection filter
             quoted = requests.utils.quote(query)
-            api_url = self.ADV_SEARCH(query=quoted, coll=self._COLL_FILTER)
-            resp = requests.get(api_url, timeout=15)
+            api_url = self.ADV_SEARCH(query=quoted, coll=self._COLL_FILTER, rows=self.ROWS_PER_PAGE, page=page)
+            with phase(f"scrape {self.name}"):
+                resp = requests.get(api_url, timeout=15)
             resp.raise_for_status()
             data = resp.json()
-            max_results = 10  # hard cap to keep search snappy
+            if data.get("response", {}).get("numFound", 0) > page * self.ROWS_PER_PAGE:
+                next_cursor = str(page + 1)
             for doc in data.get("response", {}).get("docs", []):
                 identifier = doc["identifier"]
                 title = doc.get("title", identifier)
@@ -107,8 +101,8 @@ class ArchiveOrgScraper(BaseScraper):
                         "console": chosen["console"],
                     }
                 )
-                if len(results) >= max_results:
-                    break
         except Exception as e:
+            if raise_errors:
+                raise
             LOGGER.debug("Archive.org search failed: %s", e)
-        return results 
\ No newline at end of file
+        return results, next_cursor 
\ No newline at end of file
@@ -1,5 +1,54 @@
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urljoin
+
+try:
+    from ..profiling import phase
+except ImportError:  # scraper module run directly as a script
+    from contextlib import nullcontext as phase
+
+# A page of results plus an opaque cursor for the next page (None when exhausted).
+Page = Tuple[List[Dict], Optional[str]]
+
+# Shared by all scrapers; kept small so speculative prefetching never swamps the Pi.
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is in
+    flight block and receive the same result (or exception). Nothing is cached
+    once the call completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
 
 
 class BaseScraper(ABC):
@@ -7,7 +56,109 @@ class BaseScraper(ABC):
 
     name: str  # Human readable site name
 
+    # How many speculatively fetched pages to keep per scraper.
+    MAX_PREFETCHED = 16
+    # Seconds a prefetched page stays usable; older pages are fetched again.
+    PREFETCH_TTL = 300
+
+    # Console code → first page of the site's per-console listing, crawled into the local catalog.
+    CATALOG_LISTINGS: Dict[str, str] = {}
+
+    def __init__(self):
+        self._prefetched: "OrderedDict[Tuple[str, str], Tuple[float, Future]]" = OrderedDict()
+        self._prefetch_lock = threading.Lock()
+        self._inflight = SingleFlight()
+
     @abstractmethod
+    def search_page(self, query: str, cursor: Optional[str] = None, raise_errors: bool = False) -> Page:
+        """Return one page of results and a cursor for the next one.
+
+        `cursor` is whatever a previous call returned; None means the first page.
+        Each item is a dict with keys: title, url, source, cover(optional), size(optional)
+        Failures yield an empty page unless `raise_errors` is set, in which case they propagate.
+        """
+        raise NotImplementedError
+
     def search(self, query: str) -> List[Dict]:
-        """Return a list of dicts with keys: title, url, source, cover(optional), size(optional)"""
-        raise NotImplementedError 
\ No newline at end of file
+        """Return the first page of results."""
+        return self.fetch_page(query, prefetch=False)[0]
+
+    def fetch_page(self, query: str, cursor: Optional[str] = None, prefetch: bool = True) -> Page:
+        """Like `search_page`, but reuse a prefetched page and prefetch the following one.
+
+        Concurrent calls for the same (query, cursor) share a single fetch.
+        """
+        page = self._inflight.do(("page", query, cursor), self._load_page, query, cursor)
+        if prefetch and page[1]:
+            self.prefetch(query, page[1])
+        return page
+
+    def _load_page(self, query: str, cursor: Optional[str]) -> Page:
+        entry = None
+        with self._prefetch_lock:
+            if cursor is None:
+                # A new search starts over; pages prefetched for an earlier one may be stale
+                for key in [k for k in self._prefetched if k[0] == query]:
+                    del self._prefetched[key]
+            else:
+                self._expire_prefetched()
+                entry = self._prefetched.pop((query, cursor), None)
+        if entry:
+            page = entry[1].result()
+            if page[0]:
+                return page
+        # Nothing prefetched, or the prefetch came back empty (failed): fetch it now
+        return self.search_page(query, cursor)
+
+    def _expire_prefetched(self) -> None:
+        """Drop prefetched pages older than `PREFETCH_TTL` or that came back empty.
+
+        The caller must hold `_prefetch_lock`.
+        """
+        now = time.monotonic()
+        for key, (started, future) in list(self._prefetched.items()):
+            failed = future.done() and (future.exception() is not None or not future.result()[0])
+            if failed or now - started >= self.PREFETCH_TTL:
+                del self._prefetched[key]
+
+    def crawl_page(self, url: str) -> Page:
+        """Parse one catalog listing page.
+
+        Listing pages use the same markup as search results, and HTML scrapers use the
+        next-page URL as their cursor, so this is `search_page` with the listing URL as cursor.
+        Errors are raised, so a failed fetch is never mistaken for an empty listing.
+        """
+        return self.search_page("", url, raise_errors=True)
+
+    def get_download_url(self, url: str) -> str:
+        """Resolve a game page URL to a direct file URL."""
+        raise NotImplementedError(f"{self.name} does not support downloads")
+
+    def resolve_download_url(self, url: str) -> str:
+        """`get_download_url`, with concurrent calls for the same page sharing one resolution."""
+        return self._inflight.do(("download", url), self.get_download_url, url)
+
+    def prefetch(self, query: str, cursor: str) -> None:
+        """Fetch the page at `cursor` in the background so `fetch_page` returns it instantly."""
+        key = (query, cursor)
+        with self._prefetch_lock:
+            self._expire_prefetched()
+            if key in self._prefetched:
+                return
+            self._prefetched[key] = (time.monotonic(), _PREFETCH_POOL.submit(self.search_page, query, cursor))
+            while len(self._prefetched) > self.MAX_PREFETCHED:
+                self._prefetched.popitem(last=False)
+
+    @staticmethod
+    def _find_next_link(soup, base_url: str) -> Optional[str]:
+        """Return the absolute URL of a "next page" link in a listing, if any."""
+        link = soup.find("a", rel="next", href=True)
+        if not link:
+            for a in soup.find_all("a", href=True):
+                text = a.get_text(strip=True).lower()
+                if text in ("next", "next »", "»", "›", ">"):
+                    link = a
+                    break
+        if not link or link["href"].startswith(("#", "javascript:")):
+            return None
+        return urljoin(base_url, link["href"])
@@ -1,30 +1,38 @@
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 try:
-    from .base import BaseScraper
+    from .base import BaseScraper, Page, phase
 except Exception:
-    from base import BaseScraper
+    from base import BaseScraper, Page, phase
 
 
 class RomHustlerScraper(BaseScraper):
     name = "RomHustler"
     SEARCH_URL = "https://romhustler.org/roms/search?query={query}"
+    CATALOG_LISTINGS = {
+        console: f"https://romhustler.org/roms/{console}"
+        for console in ("nes", "snes", "n64", "gb", "gbc", "gba", "genesis", "psx", "ps2", "mame")
+    }
 
-    def search(self, query: str) -> List[Dict]:
+    def search_page(self, query: str, cursor: Optional[str] = None, raise_errors: bool = False) -> Page:
         results: List[Dict] = []
+        next_cursor = None
         try:
-            url = self.SEARCH_URL.format(query=requests.utils.quote(query))
+            # The cursor is the absolute URL of the next results page
+            url = cursor or self.SEARCH_URL.format(query=requests.utils.quote(query))
             headers = {
                 "User-Agent": (
                     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
                     "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
                 )
             }
-            resp = requests.get(url, headers=headers, timeout=10)
+            with phase(f"scrape {self.name}"):
+                resp = requests.get(url, headers=headers, timeout=10)
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "html.parser")
+            with phase("parse"):
+                soup = BeautifulSoup(resp.text, "html.parser")
 
 
             size = None
@@ -59,8 +67,11 @@ class RomHustlerScraper(BaseScraper):
                    "console": console_code,
                })
 
+            next_cursor = self._find_next_link(soup, url)
 
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error in RomHustlerScraper: {e}")
 
         # Deduplicate based on title + URL
@@ -73,7 +84,7 @@ class RomHustlerScraper(BaseScraper):
             seen.add(key)
             unique.append(item)
 
-        return unique
+        return unique, next_cursor
     
     def get_download_url(self, url: str) -> str:
         headers = {
@@ -82,10 +93,12 @@ class RomHustlerScraper(BaseScraper):
                 "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
             )
         }
-        resp = requests.get(url, headers=headers, timeout=10)
+        with phase(f"scrape {self.name}"):
+            resp = requests.get(url, headers=headers, timeout=10)
         resp.raise_for_status()
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+        with phase("parse"):
+            soup = BeautifulSoup(resp.text, "html.parser")
 
         # Look for the correct <a> that contains the download button
         value = None
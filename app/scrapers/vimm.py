@@ -1,27 +1,41 @@
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict
-from .base import BaseScraper
+from typing import List, Dict, Optional
+from .base import BaseScraper, Page, phase
 
 
 class VimmScraper(BaseScraper):
     name = "Vimm's Lair"
 
     SEARCH_URL = "https://vimm.net/vault/?p=list&search={query}"
+    CATALOG_LISTINGS = {
+        "nes": "https://vimm.net/vault/?p=list&system=NES",
+        "snes": "https://vimm.net/vault/?p=list&system=SNES",
+        "n64": "https://vimm.net/vault/?p=list&system=N64",
+        "gb": "https://vimm.net/vault/?p=list&system=GB",
+        "gbc": "https://vimm.net/vault/?p=list&system=GBC",
+        "gba": "https://vimm.net/vault/?p=list&system=GBA",
+        "genesis": "https://vimm.net/vault/?p=list&system=Genesis",
+        "psx": "https://vimm.net/vault/?p=list&system=PS1",
+    }
 
-    def search(self, query: str) -> List[Dict]:
+    def search_page(self, query: str, cursor: Optional[str] = None, raise_errors: bool = False) -> Page:
         results: List[Dict] = []
+        next_cursor = None
         try:
-            url = self.SEARCH_URL.format(query=requests.utils.quote(query))
+            # The cursor is the absolute URL of the next results page
+            url = cursor or self.SEARCH_URL.format(query=requests.utils.quote(query))
             headers = {
                 "User-Agent": (
                     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
                     "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
                 )
             }
-            resp = requests.get(url, headers=headers, timeout=10)
+            with phase(f"scrape {self.name}"):
+                resp = requests.get(url, headers=headers, timeout=10)
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "html.parser")
+            with phase("parse"):
+                soup = BeautifulSoup(resp.text, "html.parser")
             tbody = soup.find("tbody")
             if tbody:
                 rows = tbody.find_all("tr")
@@ -49,8 +63,10 @@ class VimmScraper(BaseScraper):
                         "console": console_code,
                     }
                 )
+            next_cursor = self._find_next_link(soup, url)
         except Exception:
-            pass
+            if raise_errors:
+                raise
 
         # Deduplicate
         seen = set()
@@ -62,4 +78,4 @@ class VimmScraper(BaseScraper):
             seen.add(key)
             unique.append(item)
 
-        return unique 
\ No newline at end of file
+        return unique, next_cursor 
\ No newline at end of file
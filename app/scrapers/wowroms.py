@@ -1,18 +1,28 @@
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict
+from typing import Optional
 try:
-    from .base import BaseScraper
+    from .base import BaseScraper, Page, phase
 except Exception:
-    from base import BaseScraper
+    from base import BaseScraper, Page, phase
 
 class WowRomsScraper(BaseScraper):
     name = "WowRoms"
     SEARCH_URL = "https://wowroms.com/en/roms/list?search={query}"
     BASE_URL = "https://wowroms.com"
+    CATALOG_LISTINGS = {
+        "nes": "https://wowroms.com/en/roms/list/nintendo-nes",
+        "snes": "https://wowroms.com/en/roms/list/super-nintendo",
+        "n64": "https://wowroms.com/en/roms/list/nintendo-64",
+        "gb": "https://wowroms.com/en/roms/list/nintendo-gameboy",
+        "gbc": "https://wowroms.com/en/roms/list/nintendo-gameboy-color",
+        "gba": "https://wowroms.com/en/roms/list/nintendo-gameboy-advance",
+        "genesis": "https://wowroms.com/en/roms/list/sega-genesis",
+        "psx": "https://wowroms.com/en/roms/list/sony-playstation",
+    }
 
 
-    def search(self, query: str) -> List[Dict]:
+    def search_page(self, query: str, cursor: Optional[str] = None, raise_errors: bool = False) -> Page:
         headers = {
             "User-Agent": (
                 "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
@@ -21,14 +31,20 @@ class WowRomsScraper(BaseScraper):
         }
 
         try:
-            resp = requests.get(self.SEARCH_URL.format(query=requests.utils.quote(query)), headers=headers, timeout=10)
+            # The cursor is the absolute URL of the next results page
+            url = cursor or self.SEARCH_URL.format(query=requests.utils.quote(query))
+            with phase(f"scrape {self.name}"):
+                resp = requests.get(url, headers=headers, timeout=10)
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "html.parser")
+            with phase("parse"):
+                soup = BeautifulSoup(resp.text, "html.parser")
 
             wrapper = soup.find("div", id="sandBox-wrapper")
             if not wrapper:
+                if raise_errors:
+                    raise ValueError("No search results wrapper found.")
                 print("No search results wrapper found.")
-                return []
+                return [], None
 
             results = []
             for li in wrapper.select("li.element"):
@@ -40,7 +56,7 @@ class WowRomsScraper(BaseScraper):
                 if not title_tag:
                     continue
                 title = title_tag.get_text(strip=True)
-                url = self.BASE_URL + title_tag["href"]
+                game_url = self.BASE_URL + title_tag["href"]
 
                 console_tag = info.select_one("a.col-title.colorRed")
                 console = console_tag.get_text(strip=True) if console_tag else "Unknown"
@@ -57,17 +73,19 @@ class WowRomsScraper(BaseScraper):
 
                 results.append({
                     "title": title,
-                    "url": url,
+                    "url": game_url,
                     "console": console,
                     "size": size,
                     "downloads": downloads,
                     "source": self.name,
                 })
 
-            return results
+            return results, self._find_next_link(soup, url)
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error searching WowRoms: {e}")
-            return []
+            return [], None
         
     def get_download_url(self, url: str) -> str:
         headers = {
@@ -76,12 +94,15 @@ class WowRomsScraper(BaseScraper):
                 "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
             )
         }
-        resp = requests.get(url, headers=headers, timeout=10)
+        with phase(f"scrape {self.name}"):
+            resp = requests.get(url, headers=headers, timeout=10)
         resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
+        with phase("parse"):
+            soup = BeautifulSoup(resp.text, "html.parser")
         return self.BASE_URL + soup.find("a", string='Download rom', href=True)["href"]
 
 
-wr = WowRomsScraper()
-search = wr.search("mario")
-print(wr.get_download_url(search[0]["url"]))
\ No newline at end of file
+if __name__ == "__main__":
+    wr = WowRomsScraper()
+    search = wr.search("mario")
+    print(wr.get_download_url(search[0]["url"]))
\ No newline at end of file
@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .catalog import CATALOG
+from .profiling import phase
+from .scrapers import SCRAPERS
+from .utils import unify_results
+
+# How many searches to remember for "load more", and for how long (seconds).
+MAX_SESSIONS = 32
+SESSION_TTL = 600
+
+
+class SearchSession:
+    """Results of one query, grown one page at a time across all scrapers.
+
+    Unless `live` is set, the first page is answered from the local catalog and
+    the scrapers are only queried when the catalog has no strong match.
+    """
+
+    def __init__(self, query: str, live: bool = False):
+        self.query = query
+        self.live = live
+        self.from_catalog = False
+        self.created = time.monotonic()
+        self.games: List[Dict] = []
+        self.pages = 0
+        # scraper name → cursor of its next page (None once exhausted)
+        self.cursors: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def has_more(self) -> bool:
+        if self.from_catalog:
+            return False
+        return self.pages == 0 or any(self.cursors.values())
+
+    def load_until(self, page: int) -> List[Dict]:
+        """Load pages until at least `page` pages (or everything available) are merged in."""
+        with self._lock:
+            while self.pages < page and self.has_more:
+                self._load_next()
+            return self.games
+
+    def _load_next(self) -> None:
+        """Fetch the next page from every scraper that still has one and merge it in."""
+        page_results: List[Dict] = []
+        if self.pages == 0 and not self.live:
+            with phase("catalog"):
+                hits = CATALOG.search(self.query)
+                strong = CATALOG.is_strong_match(self.query, hits)
+            if strong:
+                with phase("merge"):
+                    self.games = unify_results(hits)
+                self.from_catalog = True
+                self.pages = 1
+                return
+            # Only near-misses in the catalog: scrape live and merge them in
+            page_results.extend(hits)
+        # Run scrapers sequentially to avoid blocking the Pi with too many threads
+        for scraper in SCRAPERS:
+            if self.pages and not self.cursors.get(scraper.name):
+                continue
+            results, next_cursor = scraper.fetch_page(self.query, self.cursors.get(scraper.name))
+            page_results.extend(results)
+            self.cursors[scraper.name] = next_cursor
+        with phase("merge"):
+            self.games = unify_results(page_results, existing=self.games)
+        self.pages += 1
+
+
+# (query, live) → session, so "load more" continues the pages already loaded
+_sessions: "OrderedDict[Tuple[str, bool], SearchSession]" = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def get_search(query: str, live: bool = False, page: int = 1) -> SearchSession:
+    """Return a session for `query` with at least `page` pages loaded.
+
+    Page 1 always starts afresh. Later pages continue a stored session for up to
+    `SESSION_TTL` seconds. Sessions whose first load came back empty are never stored,
+    so a failed scrape is retried on the next request.
+    """
+    key = (query.lower(), live)
+    session = None
+    if page > 1:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is not None and time.monotonic() - session.created > SESSION_TTL:
+                session = None
+    if session is None:
+        session = SearchSession(query, live=live)
+    session.load_until(max(page, 1))
+    if session.games:
+        with _sessions_lock:
+            _sessions[key] = session
+            _sessions.move_to_end(key)
+            while len(_sessions) > MAX_SESSIONS:
+                _sessions.popitem(last=False)
+    return session
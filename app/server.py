@@ -4,7 +4,8 @@ from urllib.parse import quote_plus, unquote_plus
 import json
 
 import requests
-from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, jsonify
+from markupsafe import Markup
 
 from .scrapers import SCRAPERS
 from .utils import (
@@ -16,10 +17,41 @@ from .utils import (
     ROMS_BASE_DIR,
     console_to_dir,
     is_downloadable,
+    PARTIAL_SUFFIX,
 )
+from .library import LIBRARY_INDEX, SORT_KEYS, DEFAULT_PER_PAGE, remove_stale_partials, resort_unsorted
+from .search import get_search
+from .catalog import CATALOG, CATALOG_SYNC_INTERVAL
+from .profiling import init_profiling, phase
+from .cache import FragmentCache
+from .compression import init_compression
+from .classifier import classify, read_header
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY", "change_this_secret")
+init_profiling(app)
+init_compression(app)
+
+# Rendered result lists, keyed on their data and the library index version
+LIBRARY_FRAGMENTS = FragmentCache()
+SEARCH_FRAGMENTS = FragmentCache()
+
+# Drop partial downloads an earlier run left behind when it was stopped mid-transfer
+remove_stale_partials()
+
+# Keep the local search catalog fresh in the background (set CATALOG_SYNC=0 to disable)
+CATALOG_SYNC = os.environ.get("CATALOG_SYNC", "1") != "0"
+
+
+@app.before_request
+def start_catalog_sync():
+    """Start the catalog sync thread in the first process that serves a request.
+
+    Not at import time, so the debug reloader's watcher process and scripts importing
+    the app never crawl; the catalog's lease keeps multiple workers to one crawler.
+    """
+    if CATALOG_SYNC:
+        CATALOG.start_background_sync(SCRAPERS, interval=CATALOG_SYNC_INTERVAL)
 
 
 @app.route("/")
@@ -34,18 +66,45 @@ def search():
         flash("Please enter a game title to search.")
         return redirect(url_for("index"))
 
-    all_results = []
-    # Run scrapers sequentially to avoid blocking the Pi with too many threads
-    for scraper in SCRAPERS:
-        all_results.extend(scraper.search(query))
-    games = unify_results(all_results)
-    downloaded = set(get_downloaded_games())
+    # "Load more" asks for further pages of the same search via `page`.
+    # `live` skips the local catalog and queries the sites directly.
+    page = request.args.get("page", 1, type=int)
+    live = request.args.get("live") == "1"
+    search_session = get_search(query, live=live, page=page)
+    games = search_session.games
+
+    # The list only changes with the results or the library, so repeat views skip
+    # the disk walk, JSON encoding and templating
+    with phase("library"):
+        LIBRARY_INDEX.refresh()
+    key = (
+        tuple((g["slug"], tuple(src["url"] for src in g["sources"])) for g in games),
+        LIBRARY_INDEX.version,
+    )
+    listing = SEARCH_FRAGMENTS.get_or_render(key, lambda: _render_search_results(games))
+    with phase("render"):
+        return render_template("search.html", query=query, listing=Markup(listing), search_session=search_session)
+
+
+def _render_search_results(games) -> str:
+    with phase("library"):
+        downloaded = set(get_downloaded_games())
     # Flag already downloaded and pre-encode game data for fast access in detail view
-    for game in games:
-        game["downloaded"] = game["slug"] in downloaded
-        # Add encoded representation to avoid re-scraping later
-        game["encoded"] = quote_plus(json.dumps(game))
-    return render_template("search.html", query=query, games=games)
+    with phase("encode"):
+        views = []
+        for game in games:
+            view = dict(game, downloaded=game["slug"] in downloaded)
+            # Add encoded representation to avoid re-scraping later
+            view["encoded"] = quote_plus(json.dumps(view))
+            views.append(view)
+    with phase("render"):
+        return render_template("search_results.html", games=views)
+
+
+@app.route("/suggest")
+def suggest():
+    query = request.args.get("q", "").strip()
+    return jsonify(CATALOG.suggest(query) if query else [])
 
 
 @app.route("/game/<slug>")
@@ -65,14 +124,17 @@ def game_detail(slug):
         all_results = []
         for scraper in SCRAPERS:
             all_results.extend(scraper.search(title))
-        games = unify_results(all_results)
+        with phase("merge"):
+            games = unify_results(all_results)
         game = next((g for g in games if g["slug"] == slug), None)
         if not game:
             flash("Game not found. Try searching again.")
             return redirect(url_for("index"))
 
-    downloaded = is_downloaded(slug)
-    return render_template("game.html", game=game, downloaded=downloaded)
+    with phase("library"):
+        downloaded = is_downloaded(slug)
+    with phase("render"):
+        return render_template("game.html", game=game, downloaded=downloaded)
 
 
 import os
@@ -94,10 +156,33 @@ def _get_filename_from_cd(content_disposition: str) -> str:
             return unquote(filename)
     return None
 
+
+# Slugs whose download is being resolved or streamed. A second request for the
+# same slug joins the running job instead of writing the same file twice.
+_active_downloads = set()
+_active_downloads_lock = threading.Lock()
+
+
+def _claim_download(slug: str) -> bool:
+    """Mark `slug` as downloading; return False if a job for it is already running."""
+    with _active_downloads_lock:
+        if slug in _active_downloads:
+            return False
+        _active_downloads.add(slug)
+        return True
+
+
+def _release_download(slug: str) -> None:
+    with _active_downloads_lock:
+        _active_downloads.discard(slug)
+
+
 def _download_file(url: str, dest_dir: str, slug: str = None, console: str = None):
     """Stream download to disk in a background thread."""
     if not url:
         print(f"[_download_file] No URL provided for slug={slug}. Aborting thread.")
+        if slug:
+            _release_download(slug)
         return
 
     dest_path = None  # track destination for cleanup on failure
@@ -116,23 +201,33 @@ def _download_file(url: str, dest_dir: str, slug: str = None, console: str = Non
             if slug:
                 filename = safe_filename(f"{slug}{os.path.splitext(filename)[-1]}")
 
-            # Create directory
-            console_dir_name = console_to_dir(console) if console else "unsorted"
+            # Sniff the ROM header from the start of the stream to pick the console dir,
+            # falling back to the file extension and the scraper's console hint
+            header, rest = read_header(r.iter_content(chunk_size=8192))
+            detected = classify(header, filename=filename, console=console)
+            console_dir_name = console_to_dir(detected) if detected else "unsorted"
             full_dir = os.path.join(ROMS_BASE_DIR, console_dir_name)
             os.makedirs(full_dir, exist_ok=True)
 
-            # Write file
-            dest_path = os.path.join(full_dir, filename)
+            # Write to a .part file and rename on success, so the library and the
+            # re-sort job never see an incomplete ROM
+            dest_path = os.path.join(full_dir, filename) + PARTIAL_SUFFIX
             with open(dest_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
+                f.write(header)
+                for chunk in rest:
                     if chunk:
                         f.write(chunk)
+            os.replace(dest_path, dest_path[:-len(PARTIAL_SUFFIX)])
+            LIBRARY_INDEX.invalidate()
 
     except Exception as e:
         print(f"Failed download {url}: {e}")
         # Clean up partial file if created
         if dest_path and os.path.exists(dest_path):
             os.remove(dest_path)
+    finally:
+        if slug:
+            _release_download(slug)
 
 
 @app.route("/download")
@@ -147,63 +242,104 @@ def download():
         return redirect(url_for("index"))
     
     slug = slugify_title(title)
-    if is_downloaded(slug):
-        flash("You already downloaded this game.")
-        return redirect(url_for("game_detail", slug=slug))
-    
-    download_url = None
-
-    for scraper in SCRAPERS:
-        print(scraper.name)
-        print(scraper_name)
-        if scraper.name == scraper_name:
-            try:
-                download_url = scraper.get_download_url(url)
-                print(download_url)
-            except TypeError:
-                flash("This game is restricted, download did not start.")
-                return redirect(url_for("game_detail", slug=slug))
-            except ValueError:
-                flash("This game is restricted, download did not start.")
-                return redirect(url_for("game_detail", slug=slug))
-            except Exception as e:
-                flash(f"Error downloading game: {str(e)}")
-                return redirect(url_for("game_detail", slug=slug))
-
-    # If scraper returned no download URL, abort gracefully
-    if not download_url:
-        flash("Could not obtain download link for this game.")
+    if not _claim_download(slug):
+        flash("This game is already downloading.")
         return redirect(url_for("game_detail", slug=slug))
 
-    console_dir_name = console_to_dir(console) if console else "unsorted"
-    dest_dir = os.path.join(ROMS_BASE_DIR, console_dir_name)
+    started = False
+    try:
+        if is_downloaded(slug):
+            flash("You already downloaded this game.")
+            return redirect(url_for("game_detail", slug=slug))
 
-    os.makedirs(dest_dir, exist_ok=True)
-    # if not is_downloadable(url):
-    #     flash("This game is restricted, download did not start.")
-    #     return redirect(url_for("game_detail", slug=slug))
-    flash("Download started in background. It may take a while depending on file size.")
-    threading.Thread(target=_download_file, args=(download_url, ROMS_BASE_DIR), kwargs={"slug": slug, "console": console}, daemon=True).start()
-    return redirect(url_for("game_detail", slug=slug))
+        download_url = None
+
+        for scraper in SCRAPERS:
+            print(scraper.name)
+            print(scraper_name)
+            if scraper.name == scraper_name:
+                try:
+                    download_url = scraper.resolve_download_url(url)
+                    print(download_url)
+                except TypeError:
+                    flash("This game is restricted, download did not start.")
+                    return redirect(url_for("game_detail", slug=slug))
+                except ValueError:
+                    flash("This game is restricted, download did not start.")
+                    return redirect(url_for("game_detail", slug=slug))
+                except Exception as e:
+                    flash(f"Error downloading game: {str(e)}")
+                    return redirect(url_for("game_detail", slug=slug))
+
+        # If scraper returned no download URL, abort gracefully
+        if not download_url:
+            flash("Could not obtain download link for this game.")
+            return redirect(url_for("game_detail", slug=slug))
+
+        # The console directory is chosen by _download_file once the ROM header is seen
+        # if not is_downloadable(url):
+        #     flash("This game is restricted, download did not start.")
+        #     return redirect(url_for("game_detail", slug=slug))
+        threading.Thread(target=_download_file, args=(download_url, ROMS_BASE_DIR), kwargs={"slug": slug, "console": console}, daemon=True).start()
+        started = True
+        flash("Download started in background. It may take a while depending on file size.")
+        return redirect(url_for("game_detail", slug=slug))
+    finally:
+        # The download thread releases the slug itself once it finishes
+        if not started:
+            _release_download(slug)
+
+
+def _library_args() -> dict:
+    """Parse pagination / sorting / filtering query params shared by the library view and API."""
+    sort = request.args.get("sort", "name")
+    order = request.args.get("order", "asc")
+    return {
+        "page": request.args.get("page", 1, type=int),
+        "per_page": request.args.get("per_page", DEFAULT_PER_PAGE, type=int),
+        "sort": sort if sort in SORT_KEYS else "name",
+        "order": "desc" if order == "desc" else "asc",
+        "console": request.args.get("console") or None,
+        "q": request.args.get("q", "").strip() or None,
+    }
 
 
 @app.route("/library")
 def library():
-    games = []
-    for console in os.listdir(ROMS_BASE_DIR):
-        console_path = os.path.join(ROMS_BASE_DIR, console)
-        if not os.path.isdir(console_path):
-            continue
-        for fname in os.listdir(console_path):
-            slug = fname.split(".")[0]
-            title = slug.replace("-", " ").title()
-            games.append({
-                "title": title,
-                "slug": slug,
-                "filename": fname,
-                "console": console,
-            })
-    return render_template("library.html", games=games)
+    args = _library_args()
+    with phase("library"):
+        result = LIBRARY_INDEX.query(**args)
+    key = (tuple(args.items()), result["version"])
+    with phase("render"):
+        listing = LIBRARY_FRAGMENTS.get_or_render(key, lambda: render_template(
+            "library_listing.html", games=result["items"], result=result, args=args,
+        ))
+        return render_template(
+            "library.html",
+            listing=Markup(listing),
+            args=args,
+            consoles=LIBRARY_INDEX.consoles(),
+        )
+
+
+@app.route("/api/library")
+def api_library():
+    result = LIBRARY_INDEX.query(**_library_args())
+    items = []
+    for game in result["items"]:
+        items.append(dict(
+            game,
+            download_url=url_for("serve_download", console=game["console"], filename=game["filename"]),
+            delete_url=url_for("delete_file", console=game["console"], filename=game["filename"]),
+        ))
+    return jsonify(dict(result, items=items))
+
+
+@app.route("/library/resort", methods=["POST"])
+def resort_library():
+    threading.Thread(target=resort_unsorted, daemon=True).start()
+    flash("Sorting unsorted games into console folders in the background.")
+    return redirect(url_for("library"))
 
 
 @app.route("/delete/<console>/<path:filename>", methods=["POST"])
@@ -211,6 +347,7 @@ def delete_file(console, filename):
     path = os.path.join(ROMS_BASE_DIR, console, filename)
     if os.path.exists(path):
         os.remove(path)
+        LIBRARY_INDEX.invalidate()
         flash("Game deleted successfully.")
     else:
         flash("File not found.")
@@ -1,3 +1,91 @@
 function confirmDelete() {
   return confirm('Are you sure you want to delete this game?');
-} 
\ No newline at end of file
+}
+
+// Lazy scrolling for the library: fetch the next page from the JSON API when
+// the user nears the bottom, instead of rendering the whole collection at once.
+(function () {
+  const grid = document.getElementById('library-grid');
+  if (!grid || !('IntersectionObserver' in window)) {
+    return;
+  }
+  let nextPage = grid.dataset.nextPage;
+  let loading = false;
+
+  function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+  }
+
+  function renderCard(game) {
+    const col = document.createElement('div');
+    col.className = 'col';
+    col.innerHTML =
+      '<div class="card h-100"><div class="card-body d-flex flex-column">' +
+      '<h5 class="card-title">' + escapeHtml(game.title) + '</h5>' +
+      '<p class="card-text text-muted small">' + escapeHtml(game.console) + ' &middot; ' + escapeHtml(game.size_str) + '</p>' +
+      '<div class="mt-auto d-flex justify-content-between">' +
+      '<a href="' + escapeHtml(game.download_url) + '" class="btn btn-sm btn-success">Download</a>' +
+      '<form action="' + escapeHtml(game.delete_url) + '" method="post" onsubmit="return confirmDelete();">' +
+      '<button type="submit" class="btn btn-sm btn-danger">Delete</button></form>' +
+      '</div></div></div>';
+    return col;
+  }
+
+  const sentinel = document.createElement('div');
+  grid.after(sentinel);
+  const pagination = document.getElementById('library-pagination');
+  if (pagination && nextPage) {
+    pagination.classList.add('d-none');
+  }
+
+  const observer = new IntersectionObserver(function (entries) {
+    if (!entries[0].isIntersecting || loading || !nextPage) {
+      return;
+    }
+    loading = true;
+    const sep = grid.dataset.api.indexOf('?') === -1 ? '?' : '&';
+    fetch(grid.dataset.api + sep + 'page=' + nextPage)
+      .then(function (resp) { return resp.json(); })
+      .then(function (data) {
+        data.items.forEach(function (game) { grid.appendChild(renderCard(game)); });
+        nextPage = data.has_next ? data.page + 1 : '';
+        if (!nextPage) {
+          observer.disconnect();
+        }
+      })
+      .finally(function () { loading = false; });
+  });
+  observer.observe(sentinel);
+})();
+
+// Typeahead for the search box, answered from the local catalog.
+(function () {
+  const input = document.querySelector('input[data-suggest]');
+  if (!input) {
+    return;
+  }
+  const list = document.getElementById(input.getAttribute('list'));
+  let timer = null;
+
+  input.addEventListener('input', function () {
+    clearTimeout(timer);
+    const q = input.value.trim();
+    if (q.length < 2) {
+      return;
+    }
+    timer = setTimeout(function () {
+      fetch(input.dataset.suggest + '?q=' + encodeURIComponent(q))
+        .then(function (resp) { return resp.json(); })
+        .then(function (titles) {
+          list.innerHTML = '';
+          titles.forEach(function (title) {
+            const option = document.createElement('option');
+            option.value = title;
+            list.appendChild(option);
+          });
+        });
+    }, 150);
+  });
+})();
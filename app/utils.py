@@ -1,14 +1,19 @@
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 from slugify import slugify
 import requests
 from bs4 import BeautifulSoup
 
+from .classifier import console_code
+
 # Base RetroPie roms directory (can be overridden via env)
 ROMS_BASE_DIR = os.environ.get("ROMS_BASE_DIR", os.path.expanduser("~/RetroPie/roms"))
 # Ensure base dir exists so tests/development don't explode. (On non-Pi hosts this will just create a folder)
 os.makedirs(ROMS_BASE_DIR, exist_ok=True)
 
+# Suffix of downloads still in progress; renamed away once the file is complete
+PARTIAL_SUFFIX = ".part"
+
 # Simple mapping of console codes (as reported by scrapers) → directory names in RetroPie.
 # You can extend this mapping if you add more systems.
 CONSOLE_DIR_MAP = {
@@ -33,10 +38,10 @@ def slugify_title(title: str) -> str:
 
 
 def is_downloaded(slug: str) -> bool:
-    """Return True if any file starting with slug exists anywhere under `ROMS_BASE_DIR`."""
+    """Return True if any completed file starting with slug exists anywhere under `ROMS_BASE_DIR`."""
     for root, _dirs, files in os.walk(ROMS_BASE_DIR):
         for fname in files:
-            if fname.startswith(slug):
+            if fname.startswith(slug) and not fname.endswith(PARTIAL_SUFFIX):
                 return True
     return False
 
@@ -66,12 +71,17 @@ def get_downloaded_games() -> List[str]:
     return slugs
 
 
-def unify_results(results: List[Dict]) -> List[Dict]:
+def unify_results(results: List[Dict], existing: Optional[List[Dict]] = None) -> List[Dict]:
     """Merge multiple scraper results, combining identical titles.
 
     Each item in results should have at minimum: title, url, source, and optionally cover.
+    Pass the list returned by a previous call as `existing` to merge further result
+    pages into it incrementally; sources already present (same URL) are skipped.
     """
-    merged: Dict[str, Dict] = {}
+    # Copy existing entries so lists already handed out (e.g. being rendered) never change
+    merged: Dict[str, Dict] = {
+        game["slug"]: dict(game, sources=list(game["sources"])) for game in existing or []
+    }
     for item in results:
         slug = slugify_title(item["title"])
         if slug not in merged:
@@ -82,6 +92,8 @@ def unify_results(results: List[Dict]) -> List[Dict]:
                 "sources": [],
                 "console": item.get("console"),
             }
+        if any(src["url"] == item["url"] for src in merged[slug]["sources"]):
+            continue
         merged[slug]["sources"].append({
             "source": item["source"],
             "url": item["url"],
@@ -99,8 +111,9 @@ def safe_filename(filename: str) -> str:
 
 
 def console_to_dir(console: str) -> str:
-    """Return the RetroPie directory for a given console code."""
-    return CONSOLE_DIR_MAP.get(console.lower(), "unsorted") 
+    """Return the RetroPie directory for a console code or human-readable console name."""
+    code = console_code(console) or console.lower()
+    return CONSOLE_DIR_MAP.get(code, "unsorted")
 
 
 def is_downloadable(url: str) -> bool: